@@ -3,7 +3,7 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, status, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Enum, Float, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Enum, Float, ForeignKey, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from pydantic import BaseModel
@@ -47,7 +47,7 @@ class User(Base):
     rating = Column(Integer, default=0)
     status = Column(String, default="active")
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     loans = relationship("Loan", back_populates="user")
 
 class Loan(Base):
@@ -60,7 +60,7 @@ class Loan(Base):
     conditions = Column(String, nullable=True)
     status = Column(String, default="pending")
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     user = relationship("User", back_populates="loans")
 
 class UserCreate(BaseModel):
@@ -118,6 +118,10 @@ app.add_middleware(
 @app.on_event("startup")
 def startup():
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist; exports order by updated_at
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_updated_at ON users (updated_at)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_loans_updated_at ON loans (updated_at)"))
 
 def get_db():
     db = SessionLocal()
@@ -508,3 +512,190 @@ async def analyze_text(text: str):
     except Exception as e:
         logger.error(f"Error analyzing text: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+# --- Data Export (regulator / investor reports) ---
+from typing import Iterator
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from datetime import timezone
+from sqlalchemy import select, and_
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+EXPORT_DEFAULT_CHUNK_SIZE = 5000
+EXPORT_MAX_CHUNK_SIZE = 50000
+
+# Columns exposed per table. password_hash is deliberately left out of users.
+EXPORT_TABLES = {
+    'loans': (Loan, ['id', 'user_id', 'amount', 'interest_rate', 'duration', 'conditions',
+                     'status', 'created_at', 'updated_at']),
+    'users': (User, ['id', 'name', 'email', 'phone', 'role', 'id_number', 'rating',
+                     'status', 'created_at', 'updated_at']),
+}
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert an offset-aware bound to naive UTC, matching how created_at/updated_at are stored."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def build_export_query(table: str, status: Optional[str] = None,
+                       created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                       changed_since: Optional[datetime] = None):
+    """Select the exported columns of `table`, filtered and ordered by (updated_at, id).
+
+    changed_since is inclusive (updated_at >= changed_since). Incremental runs
+    overlap at the boundary on purpose, so consumers must deduplicate on
+    (id, updated_at).
+    """
+    model, columns = EXPORT_TABLES[table]
+    created_from, created_to, changed_since = map(_naive_utc, (created_from, created_to, changed_since))
+    filters = []
+    if status:
+        filters.append(model.status == status)
+    if created_from:
+        filters.append(model.created_at >= created_from)
+    if created_to:
+        filters.append(model.created_at < created_to)
+    if changed_since:
+        filters.append(model.updated_at >= changed_since)
+    query = select(*[getattr(model, c) for c in columns])
+    if filters:
+        query = query.where(and_(*filters))
+    return query.order_by(model.updated_at, model.id)
+
+
+def iter_export_chunks(db, table: str, chunk_size: int = EXPORT_DEFAULT_CHUNK_SIZE, **filters) -> Iterator[pd.DataFrame]:
+    """Yield the export as DataFrames of at most `chunk_size` rows.
+
+    stream_results makes psycopg2 use a server-side (named) cursor, so only one
+    chunk is held in memory at a time instead of the whole table.
+    """
+    model, columns = EXPORT_TABLES[table]
+    query = build_export_query(table, **filters).execution_options(stream_results=True)
+    result = db.execute(query)
+    for rows in result.partitions(chunk_size):
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        for c in columns:
+            if isinstance(getattr(model, c).type, Integer):
+                # nullable ints would otherwise become floats (e.g. "12.0" in CSV)
+                df[c] = df[c].astype('Int64')
+            elif isinstance(getattr(model, c).type, DateTime):
+                df[c] = pd.to_datetime(df[c])
+            elif isinstance(getattr(model, c).type, Enum):
+                df[c] = df[c].map(lambda v: v.value if isinstance(v, enum.Enum) else v)
+        yield df
+
+
+def _parquet_schema(table: str):
+    import pyarrow as pa
+    model, columns = EXPORT_TABLES[table]
+    types = {Integer: pa.int64(), Float: pa.float64(), DateTime: pa.timestamp('us')}
+    return pa.schema([
+        (c, next((t for k, t in types.items() if isinstance(getattr(model, c).type, k)), pa.string()))
+        for c in columns
+    ])
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands back whatever has been written since the last drain."""
+
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def stream_export(chunks: Iterator[pd.DataFrame], fmt: str, table: str) -> Iterator[bytes]:
+    """Encode DataFrame chunks as CSV, NDJSON or Parquet, yielding bytes per chunk."""
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = _parquet_schema(table)
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+        try:
+            for df in chunks:
+                writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+        return
+
+    header_written = False
+    for df in chunks:
+        if df.empty:
+            continue
+        if fmt == 'csv':
+            yield df.to_csv(index=False, header=not header_written, date_format='%Y-%m-%dT%H:%M:%S.%f').encode('utf-8')
+            header_written = True
+        else:
+            lines = df.to_json(orient='records', lines=True, date_format='iso', date_unit='us')
+            yield (lines.rstrip('\n') + '\n').encode('utf-8')
+    if fmt == 'csv' and not header_written:
+        _, columns = EXPORT_TABLES[table]
+        yield (','.join(columns) + '\n').encode('utf-8')
+
+
+def _check_export_format(fmt: str):
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}', expected one of {', '.join(EXPORT_FORMATS)}")
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet export requires pyarrow to be installed")
+
+
+def _export_response(table: str, fmt: str, chunk_size: int, filters: Dict[str, Any]) -> StreamingResponse:
+    _check_export_format(fmt)
+    # The request-scoped session from get_db is closed before the body streams,
+    # so the export owns its own session for the lifetime of the response.
+    def body():
+        db = SessionLocal()
+        try:
+            yield from stream_export(iter_export_chunks(db, table, chunk_size, **filters), fmt, table)
+        finally:
+            db.close()
+    filename = f"{table}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.{fmt}"
+    return StreamingResponse(body(), media_type=EXPORT_FORMATS[fmt],
+                             headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+@app.get('/export/loans')
+def export_loans(format: str = 'csv',
+                 status: Optional[str] = None,
+                 created_from: Optional[datetime] = None,
+                 created_to: Optional[datetime] = None,
+                 changed_since: Optional[datetime] = None,
+                 chunk_size: int = Query(EXPORT_DEFAULT_CHUNK_SIZE, ge=1, le=EXPORT_MAX_CHUNK_SIZE)):
+    return _export_response('loans', format, chunk_size, dict(
+        status=status, created_from=created_from, created_to=created_to, changed_since=changed_since))
+
+
+@app.get('/export/users')
+def export_users(format: str = 'csv',
+                 status: Optional[str] = None,
+                 created_from: Optional[datetime] = None,
+                 created_to: Optional[datetime] = None,
+                 changed_since: Optional[datetime] = None,
+                 chunk_size: int = Query(EXPORT_DEFAULT_CHUNK_SIZE, ge=1, le=EXPORT_MAX_CHUNK_SIZE)):
+    return _export_response('users', format, chunk_size, dict(
+        status=status, created_from=created_from, created_to=created_to, changed_since=changed_since))
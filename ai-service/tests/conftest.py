@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# main.py builds its engine at import time, so point it at a throwaway
+# SQLite database before any test imports it
+_db_dir = tempfile.mkdtemp(prefix="microcreditchain-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
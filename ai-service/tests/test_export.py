@@ -0,0 +1,144 @@
+import io
+import json
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import export
+from main import Base, engine, SessionLocal, User, Loan, RoleEnum
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    main.startup()
+    session = SessionLocal()
+    lender = User(name="John Lender", email="lender@example.com", phone="+263771234568",
+                  role=RoleEnum.lender, password_hash="secret-hash",
+                  created_at=datetime(2025, 1, 1), updated_at=datetime(2025, 1, 1))
+    session.add(lender)
+    session.commit()
+    for day, status in [(1, "active"), (2, "active"), (3, "closed")]:
+        stamp = datetime(2025, 1, day)
+        session.add(Loan(user_id=lender.id, amount=1000.0 * day, interest_rate=10.0, duration="3 months",
+                         status=status, created_at=stamp, updated_at=stamp))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(main.app)
+
+
+def test_csv_round_trips_with_one_row_chunks(client):
+    r = client.get("/export/loans", params={"format": "csv", "chunk_size": 1})
+    assert r.status_code == 200
+    assert r.text.count("id,user_id") == 1
+    df = pd.read_csv(io.StringIO(r.text), parse_dates=["created_at", "updated_at"])
+    assert list(df["id"]) == [1, 2, 3]
+    assert list(df["user_id"]) == [1, 1, 1]
+    assert df["updated_at"].iloc[2] == pd.Timestamp(2025, 1, 3)
+
+
+def test_ndjson_round_trips_with_one_row_chunks(client):
+    r = client.get("/export/users", params={"format": "ndjson", "chunk_size": 1})
+    assert r.status_code == 200
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert len(rows) == 1
+    assert rows[0]["role"] == "lender"
+    assert rows[0]["created_at"] == "2025-01-01T00:00:00.000000"
+
+
+def test_parquet_round_trips_with_one_row_chunks(client):
+    r = client.get("/export/loans", params={"format": "parquet", "chunk_size": 1})
+    assert r.status_code == 200
+    df = pd.read_parquet(io.BytesIO(r.content))
+    assert list(df["id"]) == [1, 2, 3]
+    assert list(df["amount"]) == [1000.0, 2000.0, 3000.0]
+    assert df["created_at"].iloc[0] == pd.Timestamp(2025, 1, 1)
+
+
+def test_password_hash_is_never_exported(client):
+    for fmt in ("csv", "ndjson"):
+        r = client.get("/export/users", params={"format": fmt})
+        assert "password_hash" not in r.text
+        assert "secret-hash" not in r.text
+    df = pd.read_parquet(io.BytesIO(client.get("/export/users", params={"format": "parquet"}).content))
+    assert "password_hash" not in df.columns
+
+
+def test_empty_export_keeps_csv_header_and_valid_parquet(client):
+    params = {"status": "no-such-status"}
+    r = client.get("/export/loans", params={**params, "format": "csv"})
+    assert r.text.strip() == ",".join(main.EXPORT_TABLES["loans"][1])
+    r = client.get("/export/loans", params={**params, "format": "parquet"})
+    df = pd.read_parquet(io.BytesIO(r.content))
+    assert df.empty
+    assert list(df.columns) == main.EXPORT_TABLES["loans"][1]
+
+
+def test_filters(client):
+    r = client.get("/export/loans", params={"format": "ndjson", "status": "active",
+                                            "created_from": "2025-01-02T00:00:00"})
+    assert [json.loads(line)["id"] for line in r.text.splitlines()] == [2]
+
+
+def test_tz_aware_bounds_are_converted_to_utc(client):
+    # 2025-01-02T02:00:00+02:00 is 2025-01-02T00:00:00 UTC, so loan 2 is included
+    r = client.get("/export/loans", params={"format": "ndjson", "changed_since": "2025-01-02T02:00:00+02:00"})
+    assert [json.loads(line)["id"] for line in r.text.splitlines()] == [2, 3]
+
+
+def test_unknown_format_is_rejected(client):
+    assert client.get("/export/loans", params={"format": "xml"}).status_code == 400
+
+
+def _read_ids(path):
+    with open(path) as f:
+        return [json.loads(line)["id"] for line in f if line.strip()]
+
+
+def test_state_file_exports_only_rows_changed_since_last_run(db, tmp_path):
+    state = tmp_path / "state"
+    out = tmp_path / "loans.ndjson"
+    argv = ["loans", "--format", "ndjson", "--output", str(out), "--state-file", str(state)]
+
+    export.main(argv)
+    assert _read_ids(out) == [1, 2, 3]
+    assert export.read_watermark(str(state)) == datetime(2025, 1, 3)
+
+    loan = db.query(Loan).filter(Loan.id == 1).first()
+    loan.status = "repaid"
+    db.commit()
+
+    export.main(argv)
+    # loan 3 sits on the inclusive watermark boundary and is exported again;
+    # loans are deduplicated downstream on (id, updated_at)
+    assert _read_ids(out) == [3, 1]
+    assert not (tmp_path / "loans.ndjson.tmp").exists()
+
+
+def test_watermark_is_capped_at_start_minus_lag():
+    started = datetime(2025, 1, 10, 12, 0, 0)
+    assert export.next_watermark(datetime(2025, 1, 10, 11, 59, 0), started, 300) == datetime(2025, 1, 10, 11, 55, 0)
+    assert export.next_watermark(datetime(2025, 1, 9), started, 300) == datetime(2025, 1, 9)
+
+
+def test_failed_export_leaves_previous_output_intact(db, tmp_path, monkeypatch):
+    out = tmp_path / "loans.csv"
+    out.write_text("previous good export\n")
+
+    def broken(*args, **kwargs):
+        yield b"partial"
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(export, "stream_export", broken)
+    with pytest.raises(RuntimeError):
+        export.main(["loans", "--output", str(out)])
+    assert out.read_text() == "previous good export\n"
+    assert not (tmp_path / "loans.csv.tmp").exists()